@@ -1,8 +1,18 @@
 import asyncio
+import json
 import logging
+import re
 import sys
-from typing import Any
+from typing import Any, Dict, List, Optional, Tuple
 from fastmcp import Client, FastMCP
+from fastmcp.client.transports import FastMCPTransport
+from fastmcp.exceptions import NotFoundError, ToolError
+
+# orjson decodes tool results faster when installed; see _json_loads
+try:
+    from orjson import loads as _orjson_loads
+except ImportError:
+    _orjson_loads = None
 
 # Configure logging
 logging.basicConfig(
@@ -12,6 +22,190 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Plain numeric tool output; group 1 marks a fractional part (float vs int)
+_NUMERIC_RE = re.compile(r'^-?\d+(\.\d*)?$')
+
+
+def _json_loads(text: str) -> Any:
+    """
+    Decode JSON, trying orjson first when it is installed.
+    
+    orjson is stricter than the stdlib decoder (it rejects NaN and Infinity,
+    for example), so anything it refuses is retried with `json.loads` to keep
+    the same results either way. Both raise ValueError subclasses on failure.
+    """
+    if _orjson_loads is not None:
+        try:
+            return _orjson_loads(text)
+        except ValueError:
+            pass
+    return json.loads(text)
+
+
+class _ValueContent:
+    """Tool content carrying the already-decoded Python return value."""
+    
+    __slots__ = ("value",)
+    
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class _InProcessResult:
+    """Minimal stand-in for CallToolResult wrapping a single _ValueContent."""
+    
+    __slots__ = ("content",)
+    
+    def __init__(self, value: Any):
+        self.content = [_ValueContent(value)]
+
+
+class InProcessClient:
+    """
+    Wraps a Client and, for in-process servers, calls tools on the server.
+    
+    When the client uses a FastMCPTransport, `call_tool` goes through the
+    server's own `call_tool` entry point (validation, middleware, context
+    injection and error handling included), skipping only the MCP session
+    hop and the client-side JSON decode of the result. The server still
+    serializes the result content as usual. Everything else goes through
+    the wrapped client.
+    """
+    
+    def __init__(self, client: Client):
+        self._client = client
+        transport = client.transport
+        self._server = transport.server if isinstance(transport, FastMCPTransport) else None
+    
+    @property
+    def in_process(self) -> bool:
+        """Whether tool calls skip the MCP session."""
+        return self._server is not None
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._client, name)
+    
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a tool, going straight to the server when in-process."""
+        if self._server is None:
+            return await self._client.call_tool(name, arguments)
+        
+        try:
+            result = await self._server.call_tool(name, arguments or {})
+        except NotFoundError:
+            # Let the client report unknown tools exactly as over MCP
+            return await self._client.call_tool(name, arguments)
+        except ToolError:
+            # Already carries the "Error calling tool ..." message MCP returns
+            raise
+        except Exception as e:
+            # e.g. argument ValidationError, reported verbatim over MCP too
+            raise ToolError(str(e)) from e
+        
+        structured = result.structured_content
+        if structured is None:
+            # No structured output; unwrap the text content as usual
+            return result
+        # Primitive and list returns are wrapped as {"result": ...} on the wire
+        if (result.meta or {}).get("fastmcp", {}).get("wrap_result"):
+            structured = structured["result"]
+        return _InProcessResult(structured)
+
+
+# Tools that BatchingClient may coalesce into a single `evaluate_batch` call
+_BATCHABLE_TOOLS = frozenset({"add", "subtract", "multiply", "divide"})
+_BATCH_ARGS = frozenset({"a", "b"})
+
+
+class BatchingClient:
+    """
+    Coalesces concurrent arithmetic tool calls into one `evaluate_batch` call.
+    
+    Calls are queued for up to `max_wait_ms` (or until `max_batch` are
+    pending) and then sent together; each caller gets back its own result.
+    `max_batch` only triggers an early flush, it does not cap the batch size:
+    calls queued before the flush runs all go out together.
+    
+    Calls whose arguments are not exactly `a` and `b`, other tools, and every
+    call on an in-process InProcessClient are forwarded to the wrapped client
+    unchanged. A batched operation that fails is re-sent on its own so the
+    caller sees the same error as an unbatched call.
+    """
+    
+    def __init__(self, client: Client, max_batch: int = 32, max_wait_ms: float = 5):
+        self._client = client
+        self._direct = getattr(client, "in_process", False)
+        self._max_batch = max_batch
+        self._max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._full = asyncio.Event()
+        self._flusher: Optional[asyncio.Task] = None
+    
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> Any:
+        """Call a tool and return its extracted result value."""
+        if self._direct or name not in _BATCHABLE_TOOLS or arguments.keys() != _BATCH_ARGS:
+            return extract_tool_result(await self._client.call_tool(name, arguments))
+        
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((name, arguments, future))
+        if len(self._pending) >= self._max_batch:
+            self._full.set()
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+    
+    async def _flush(self) -> None:
+        """Wait for the batch window to close, then send the queued calls."""
+        try:
+            await asyncio.wait_for(self._full.wait(), self._max_wait)
+        except asyncio.TimeoutError:
+            pass
+        
+        batch, self._pending = self._pending, []
+        self._full.clear()
+        self._flusher = None
+        
+        try:
+            if len(batch) == 1:
+                name, arguments, future = batch[0]
+                result = await self._client.call_tool(name, arguments)
+                if not future.done():
+                    future.set_result(extract_tool_result(result))
+                return
+            
+            ops = [{**arguments, "op": name} for name, arguments, _ in batch]
+            result = await self._client.call_tool("evaluate_batch", {"ops": ops})
+            outcomes = extract_tool_result(result)
+            if not isinstance(outcomes, list) or len(outcomes) != len(batch):
+                raise ToolError(f"evaluate_batch returned a malformed result for {len(batch)} operations")
+            # Outcomes come back in request order, so position maps to caller;
+            # callers that were cancelled meanwhile are skipped
+            failed = []
+            for (name, arguments, future), outcome in zip(batch, outcomes):
+                if future.done():
+                    continue
+                if "error" in outcome:
+                    failed.append((name, arguments, future))
+                else:
+                    future.set_result(outcome["result"])
+            
+            # Replay failures unbatched so errors read exactly as for a single call
+            retries = await asyncio.gather(
+                *(self._client.call_tool(name, arguments) for name, arguments, _ in failed),
+                return_exceptions=True
+            )
+            for (_, _, future), retry in zip(failed, retries):
+                if future.done():
+                    continue
+                if isinstance(retry, Exception):
+                    future.set_exception(retry)
+                else:
+                    future.set_result(extract_tool_result(retry))
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
 
 async def main():
     """
@@ -26,7 +220,9 @@ async def main():
     
     try:
         # Create client connected to the server
-        async with Client(server) as client:
+        async with Client(server) as mcp_client:
+            # In-process server: tool calls skip the transport and JSON codec
+            client = InProcessClient(mcp_client)
             logger.info("✓ Connected to Calculator Server")
             
             # ==================== 1. DISCOVER CAPABILITIES ====================
@@ -35,23 +231,37 @@ async def main():
             print("1. DISCOVERING SERVER CAPABILITIES")
             print("="*60)
             
+            # Discovery calls are independent, so issue them concurrently
+            tools, resources, prompts = await asyncio.gather(
+                client.list_tools(),
+                client.list_resources(),
+                client.list_prompts(),
+                return_exceptions=True
+            )
+            
             # List available tools
-            tools = await client.list_tools()
-            print(f"\nAvailable Tools ({len(tools)}):")
-            for tool in tools:
-                print(f"  • {tool.name}: {tool.description}")
+            if isinstance(tools, Exception):
+                print(f"\n  ✗ Could not list tools: {tools}")
+            else:
+                print(f"\nAvailable Tools ({len(tools)}):")
+                for tool in tools:
+                    print(f"  • {tool.name}: {tool.description}")
             
             # List available resources
-            resources = await client.list_resources()
-            print(f"\nAvailable Resources ({len(resources)}):")
-            for resource in resources:
-                print(f"  • {resource.uri}: {resource.name or resource.uri}")
+            if isinstance(resources, Exception):
+                print(f"\n  ✗ Could not list resources: {resources}")
+            else:
+                print(f"\nAvailable Resources ({len(resources)}):")
+                for resource in resources:
+                    print(f"  • {resource.uri}: {resource.name or resource.uri}")
             
             # List available prompts
-            prompts = await client.list_prompts()
-            print(f"\nAvailable Prompts ({len(prompts)}):")
-            for prompt in prompts:
-                print(f"  • {prompt.name}: {prompt.description}")
+            if isinstance(prompts, Exception):
+                print(f"\n  ✗ Could not list prompts: {prompts}")
+            else:
+                print(f"\nAvailable Prompts ({len(prompts)}):")
+                for prompt in prompts:
+                    print(f"  • {prompt.name}: {prompt.description}")
             
             # ==================== 2. CALL TOOLS ====================
             
@@ -59,25 +269,40 @@ async def main():
             print("2. CALLING TOOLS")
             print("="*60)
             
+            # Over a real transport, arithmetic calls issued together are
+            # coalesced into one `evaluate_batch` request; with this in-process
+            # client the batcher dispatches each call directly instead
+            batcher = BatchingClient(client)
+            
+            # The three tests are independent, so issue them together and
+            # report the results in order
+            r1, r2, r3 = await asyncio.gather(
+                batcher.call_tool("add", {"a": 15, "b": 27}),
+                batcher.call_tool("divide", {"a": 100, "b": 5}),
+                batcher.call_tool("divide", {"a": 10, "b": 0}),
+                return_exceptions=True
+            )
+            
             # Simple addition
             print("\nTest 1: Adding 15 + 27")
-            result = await client.call_tool("add", {"a": 15, "b": 27})
-            result_value = extract_tool_result(result)
-            print(f"  Result: 15 + 27 = {result_value}")
+            if isinstance(r1, Exception):
+                print(f"  ✗ Unexpected error: {r1}")
+            else:
+                print(f"  Result: 15 + 27 = {r1}")
             
             # Division with error handling
             print("\nTest 2: Dividing 100 / 5")
-            result = await client.call_tool("divide", {"a": 100, "b": 5})
-            result_value = extract_tool_result(result)
-            print(f"  Result: 100 / 5 = {result_value}")
+            if isinstance(r2, Exception):
+                print(f"  ✗ Unexpected error: {r2}")
+            else:
+                print(f"  Result: 100 / 5 = {r2}")
             
             # Error case: division by zero
             print("\nTest 3: Division by Zero (Error Handling)")
-            try:
-                result = await client.call_tool("divide", {"a": 10, "b": 0})
-                print(f"  Unexpected success: {result}")
-            except Exception as e:
-                print(f"  ✓ Error caught correctly: {str(e)}")
+            if isinstance(r3, Exception):
+                print(f"  ✓ Error caught correctly: {str(r3)}")
+            else:
+                print(f"  Unexpected success: {r3}")
             
             # ==================== 3. READ RESOURCES ====================
             
@@ -85,17 +310,28 @@ async def main():
             print("3. READING RESOURCES")
             print("="*60)
             
+            # Both resources are independent, so fetch them concurrently
+            settings_resource, guide_resource = await asyncio.gather(
+                client.read_resource("config://calculator/settings"),
+                # Only the preview is needed, so fetch just its first 200 characters
+                client.read_resource("docs://calculator/guide/200"),
+                return_exceptions=True
+            )
+            
             # Read settings resource
             print("\nFetching Calculator Settings...")
-            settings_resource = await client.read_resource("config://calculator/settings")
-            print(f"  Version: {settings_resource[0].text}")
+            if isinstance(settings_resource, Exception):
+                print(f"  ✗ Could not read settings: {settings_resource}")
+            else:
+                print(f"  Version: {settings_resource[0].text}")
             
             # Read guide resource
             print("\nFetching Calculator Guide...")
-            guide_resource = await client.read_resource("docs://calculator/guide")
-            # Print first 200 characters of guide
-            guide_text = guide_resource[0].text[:200] + "..."
-            print(f"  {guide_text}")
+            if isinstance(guide_resource, Exception):
+                print(f"  ✗ Could not read guide: {guide_resource}")
+            else:
+                guide_text = guide_resource[0].text + "..."
+                print(f"  {guide_text}")
             
             # ==================== 4. CHAINING OPERATIONS ====================
             
@@ -106,21 +342,14 @@ async def main():
             # Calculate: (10 + 5) * 3 - 7
             print("\nCalculating: (10 + 5) * 3 - 7")
             
-            # Step 1: Add
-            print("  Step 1: Add 10 + 5")
-            add_result = await client.call_tool("add", {"a": 10, "b": 5})
-            step1 = extract_tool_result(add_result)
-            print(f"    Result: {step1}")
-            
-            # Step 2: Multiply
-            print("  Step 2: Multiply 15 * 3")
-            mult_result = await client.call_tool("multiply", {"a": step1, "b": 3})
-            step2 = extract_tool_result(mult_result)
-            print(f"    Result: {step2}")
-            
-            # Step 3: Subtract
-            print("  Step 3: Subtract 45 - 7")
-            final_result = await client.call_tool("subtract", {"a": step2, "b": 7})
+            # All three steps run server-side in a single round-trip;
+            # "$i" refers to the result of step i
+            print("  Steps: add 10 + 5 -> multiply by 3 -> subtract 7")
+            final_result = await client.call_tool("evaluate", {"ops": [
+                {"op": "add", "a": 10, "b": 5},
+                {"op": "multiply", "a": "$0", "b": 3},
+                {"op": "subtract", "a": "$1", "b": 7},
+            ]})
             final = extract_tool_result(final_result)
             print(f"    Final Result: {final}")
             
@@ -145,6 +374,14 @@ async def main():
         sys.exit(1)
 
 
+def _coerce_number(text_val: str) -> Any:
+    """Convert a plain numeric string to int/float, else return it unchanged."""
+    match = _NUMERIC_RE.match(text_val)
+    if match is None:
+        return text_val
+    return float(text_val) if match.group(1) else int(text_val)
+
+
 def extract_tool_result(response: Any) -> Any:
     """
     Extract the actual result value from a tool response.
@@ -152,70 +389,62 @@ def extract_tool_result(response: Any) -> Any:
     MCP wraps results in content objects, this helper unwraps them.
     """
     try:
-        if hasattr(response, 'content') and response.content:
-            content = response.content[0]
-            # Prefer explicit text content when available (TextContent)
-            if hasattr(content, 'text') and content.text is not None:
-                # If the text is JSON, try to parse and extract a `result` field
-                import json as _json
-                text_val = content.text
-                try:
-                    parsed_text = _json.loads(text_val)
-                    # If JSON contains a result field, return it
-                    if isinstance(parsed_text, dict) and 'result' in parsed_text:
-                        return parsed_text.get('result')
-                    return parsed_text
-                except _json.JSONDecodeError:
-                    # Try to convert plain text to number
-                    try:
-                        if '.' in text_val:
-                            return float(text_val)
-                        return int(text_val)
-                    except Exception:
-                        return text_val
-
-            # Try to extract JSON result via model `.json()` or dict-like `.json`
-            if hasattr(content, 'json'):
-                try:
-                    if callable(content.json):
-                        json_str = content.json()
-                        import json as _json
-                        try:
-                            parsed = _json.loads(json_str)
-                        except _json.JSONDecodeError:
-                            return json_str
-                    else:
-                        parsed = content.json
-
-                    # If parsed is a dict, try common shapes
-                    if isinstance(parsed, dict):
-                        # If nested result exists
-                        if 'result' in parsed:
-                            res = parsed.get('result')
-                        elif 'text' in parsed:
-                            res = parsed.get('text')
-                        else:
-                            res = parsed
-
-                        # If res is str that looks like a number, convert
-                        if isinstance(res, str):
-                            try:
-                                if '.' in res:
-                                    return float(res)
-                                return int(res)
-                            except Exception:
-                                return res
-                        return res
-
-                    return parsed
-                except Exception:
-                    pass
+        content = response.content[0]
+    except (AttributeError, IndexError, TypeError):
         return response
-    except Exception as e:
-        logger.warning(f"Could not extract result: {e}")
+    
+    # In-process results already hold the Python value
+    if type(content) is _ValueContent:
+        return content.value
+    
+    # Fast path: TextContent carrying a plain number (every arithmetic tool)
+    text_val = getattr(content, 'text', None)
+    if text_val is not None:
+        value = _coerce_number(text_val)
+        if value is not text_val:
+            return value
+        # If the text is JSON, try to parse and extract a `result` field
+        try:
+            parsed_text = _json_loads(text_val)
+        except ValueError:
+            return text_val
+        if isinstance(parsed_text, dict) and 'result' in parsed_text:
+            return parsed_text['result']
+        return parsed_text
+    
+    # Try to extract JSON result via model `.json()` or dict-like `.json`
+    try:
+        parsed = content.json
+    except AttributeError:
         return response
+    if callable(parsed):
+        json_str = parsed()
+        try:
+            parsed = _json_loads(json_str)
+        except ValueError:
+            return json_str
+    
+    # If parsed is a dict, try common shapes
+    if isinstance(parsed, dict):
+        if 'result' in parsed:
+            res = parsed['result']
+        elif 'text' in parsed:
+            res = parsed['text']
+        else:
+            res = parsed
+        # If res is str that looks like a number, convert
+        return _coerce_number(res) if isinstance(res, str) else res
+    
+    return parsed
 
 
 if __name__ == "__main__":
     logger.info("Calculator Client Starting...")
-    asyncio.run(main())
\ No newline at end of file
+    
+    # Use the libuv-backed event loop when uvloop is installed
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        uvloop.run(main())
\ No newline at end of file
@@ -1,14 +1,16 @@
+import json
 import logging
+import operator
 import sys
-from typing import Dict
+import textwrap
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping
 from fastmcp import FastMCP
+from log_setup import configure_logging
+from pydantic import TypeAdapter, ValidationError
 
 # Configure logging to stderr (critical for MCP protocol integrity)
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stderr
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create the FastMCP server instance
@@ -28,13 +30,10 @@ def add(a: float, b: float) -> float:
     Returns:
         Sum of a and b
     """
-    try:
-        result = a + b
-        logger.info(f"Addition performed: {a} + {b} = {result}")
-        return result
-    except TypeError as e:
-        logger.error(f"Type error in add: {e}")
-        raise ValueError(f"Invalid input types: {e}")
+    result = a + b
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Addition performed: %s + %s = %s", a, b, result)
+    return result
 
 
 @mcp.tool
@@ -49,13 +48,10 @@ def subtract(a: float, b: float) -> float:
     Returns:
         Difference of a and b
     """
-    try:
-        result = a - b
-        logger.info(f"Subtraction performed: {a} - {b} = {result}")
-        return result
-    except TypeError as e:
-        logger.error(f"Type error in subtract: {e}")
-        raise ValueError(f"Invalid input types: {e}")
+    result = a - b
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Subtraction performed: %s - %s = %s", a, b, result)
+    return result
 
 
 @mcp.tool
@@ -70,13 +66,10 @@ def multiply(a: float, b: float) -> float:
     Returns:
         Product of a and b
     """
-    try:
-        result = a * b
-        logger.info(f"Multiplication performed: {a} * {b} = {result}")
-        return result
-    except TypeError as e:
-        logger.error(f"Type error in multiply: {e}")
-        raise ValueError(f"Invalid input types: {e}")
+    result = a * b
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Multiplication performed: %s * %s = %s", a, b, result)
+    return result
 
 
 @mcp.tool
@@ -94,53 +87,142 @@ def divide(a: float, b: float) -> float:
     Raises:
         ValueError: If attempting to divide by zero
     """
+    if b == 0.0:
+        logger.warning("Division by zero attempted: %s / %s", a, b)
+        raise ValueError("Cannot divide by zero")
+    
+    result = a / b
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Division performed: %s / %s = %s", a, b, result)
+    return result
+
+
+# Operation name -> binary function, shared by the batch `evaluate` tool
+_OPERATIONS = {
+    "add": operator.add,
+    "subtract": operator.sub,
+    "multiply": operator.mul,
+    "divide": operator.truediv,
+    "sub": operator.sub,
+    "mul": operator.mul,
+    "div": operator.truediv,
+}
+
+
+_FLOAT_ADAPTER = TypeAdapter(float)
+_STEP_KEYS = frozenset({"op", "a", "b"})
+
+
+def _resolve_operand(value: Any, results: List[float]) -> float:
+    """Resolve a literal number or a "$i" reference to the i-th prior result."""
+    if isinstance(value, str) and value.startswith("$"):
+        index = value[1:]
+        # Only non-negative integer indexes; "$-1" must not wrap around
+        if not (index.isascii() and index.isdigit()) or int(index) >= len(results):
+            raise ValueError(f"Invalid result reference: {value}")
+        return results[int(index)]
+    # Coerce literals exactly like the `float` parameters of the single-op
+    # tools, so a step gives the same result batched or sent on its own
     try:
-        if b == 0:
-            logger.warning(f"Division by zero attempted: {a} / {b}")
-            raise ValueError("Cannot divide by zero")
-        
-        result = a / b
-        logger.info(f"Division performed: {a} / {b} = {result}")
-        return result
-    except (TypeError, ZeroDivisionError) as e:
-        logger.error(f"Error in divide: {e}")
-        raise ValueError(f"Division error: {e}")
+        return _FLOAT_ADAPTER.validate_python(value)
+    except ValidationError:
+        raise ValueError(f"Invalid operand: {value!r}")
 
 
-# ==================== RESOURCES ====================
+def _apply_operation(step: Dict[str, Any], results: List[float]) -> float:
+    """Apply a single {"op", "a", "b"} step, resolving "$i" operands."""
+    if step.keys() != _STEP_KEYS:
+        missing = sorted(_STEP_KEYS - step.keys())
+        extra = sorted(step.keys() - _STEP_KEYS)
+        raise ValueError(f"Invalid step keys: missing {missing}, unexpected {extra}")
+    
+    op = step["op"]
+    func = _OPERATIONS.get(op) if isinstance(op, str) else None
+    if func is None:
+        raise ValueError(f"Unknown operation: {op!r}")
+    
+    a = _resolve_operand(step["a"], results)
+    b = _resolve_operand(step["b"], results)
+    if func is operator.truediv and b == 0.0:
+        logger.warning("Division by zero attempted: %s / %s", a, b)
+        raise ValueError("Cannot divide by zero")
+    
+    return func(a, b)
+
 
-@mcp.resource("config://calculator/settings")
-def get_settings() -> Dict:
+@mcp.tool
+def evaluate(ops: List[Dict[str, Any]]) -> float:
     """
-    Provides calculator configuration and available operations.
+    Evaluate a chain of operations in a single call.
+    
+    Each step is a dict like {"op": "add", "a": 10, "b": 5}. Operands may be
+    numbers or "$i" references to the result of step i (zero-based).
     
+    Args:
+        ops: Ordered list of operations to perform
+        
     Returns:
-        Dictionary containing calculator settings and metadata
+        Result of the last operation
+        
+    Raises:
+        ValueError: If the list is empty, an operation is unknown, an operand
+            is invalid, or a division by zero is attempted
     """
-    logger.debug("Fetching calculator settings")
+    if not ops:
+        raise ValueError("No operations to evaluate")
     
-    return {
-        "version": "1.0.0",
-        "operations": ["add", "subtract", "multiply", "divide"],
-        "precision": "IEEE 754 double precision",
-        "max_value": 1.7976931348623157e+308,
-        "min_value": -1.7976931348623157e+308,
-        "supports_negative": True,
-        "supports_decimals": True
-    }
+    results: List[float] = []
+    for step in ops:
+        results.append(_apply_operation(step, results))
+    
+    result = float(results[-1])
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Evaluated %s chained operations = %s", len(ops), result)
+    return result
 
 
-@mcp.resource("docs://calculator/guide")
-def get_guide() -> str:
+@mcp.tool
+def evaluate_batch(ops: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """
-    Provides a user guide for the calculator server.
+    Evaluate independent operations in a single call.
+    
+    Unlike `evaluate`, steps do not reference each other and a failing step
+    does not abort the rest of the batch.
     
+    Args:
+        ops: List of {"op", "a", "b"} operations
+        
     Returns:
-        String containing usage guide and examples
+        One {"result": value} or {"error": message} entry per operation,
+        in request order
     """
-    logger.debug("Retrieving calculator guide")
+    outcomes: List[Dict[str, Any]] = []
+    for step in ops:
+        try:
+            outcomes.append({"result": float(_apply_operation(step, []))})
+        except Exception as e:
+            outcomes.append({"error": str(e)})
     
-    guide = """
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("Evaluated batch of %s operations", len(ops))
+    return outcomes
+
+
+# ==================== RESOURCES ====================
+
+# Resource payloads never change, so build them once at import time
+_SETTINGS: Mapping[str, Any] = MappingProxyType({
+    "version": "1.0.0",
+    "operations": ["add", "subtract", "multiply", "divide", "evaluate", "evaluate_batch"],
+    "precision": "IEEE 754 double precision",
+    "max_value": 1.7976931348623157e+308,
+    "min_value": -1.7976931348623157e+308,
+    "supports_negative": True,
+    "supports_decimals": True
+})
+_SETTINGS_JSON = json.dumps(dict(_SETTINGS))
+
+_GUIDE = textwrap.dedent("""
     # Calculator Server Guide
     
     ## Available Operations
@@ -157,6 +239,15 @@ def get_guide() -> str:
     4. **divide(a, b)**: Returns a / b
        Example: divide(20, 4) = 5.0
     
+    5. **evaluate(ops)**: Runs a chain of operations in one call
+       Example: evaluate([{"op": "add", "a": 10, "b": 5},
+                          {"op": "multiply", "a": "$0", "b": 3}]) = 45.0
+    
+    6. **evaluate_batch(ops)**: Runs independent operations in one call
+       Example: evaluate_batch([{"op": "add", "a": 1, "b": 2},
+                                {"op": "divide", "a": 1, "b": 0}])
+                = [{"result": 3.0}, {"error": "Cannot divide by zero"}]
+    
     ## Error Handling
     
     - Division by zero will raise a ValueError
@@ -167,27 +258,59 @@ def get_guide() -> str:
     
     The calculator uses IEEE 754 double precision floating-point arithmetic.
     Results may contain minor rounding errors for some operations.
+    """)
+
+
+@mcp.resource("config://calculator/settings", mime_type="application/json")
+def get_settings() -> str:
     """
+    Provides calculator configuration and available operations.
     
-    return guide
+    Returns:
+        JSON string containing calculator settings and metadata
+    """
+    logger.debug("Fetching calculator settings")
+    return _SETTINGS_JSON
 
 
-# ==================== PROMPTS ====================
+@mcp.resource("docs://calculator/guide")
+def get_guide() -> str:
+    """
+    Provides a user guide for the calculator server.
+    
+    Returns:
+        String containing usage guide and examples
+    """
+    logger.debug("Retrieving calculator guide")
+    return _GUIDE
 
-@mcp.prompt
-def calculate_expression(expression: str) -> str:
+
+@mcp.resource("docs://calculator/guide/{head}")
+def get_guide_head(head: int) -> str:
     """
-    Provides instructions for evaluating a mathematical expression.
+    Provides the first `head` characters of the calculator guide.
+    
+    Lets clients fetch a preview without transferring the whole guide.
     
     Args:
-        expression: A mathematical expression to evaluate
+        head: Number of characters to return
         
     Returns:
-        Formatted prompt instructing the LLM how to evaluate the expression
+        Leading slice of the usage guide
+        
+    Raises:
+        ValueError: If head is negative
     """
-    logger.debug(f"Generating calculation prompt for: {expression}")
-    
-    prompt = f"""
+    if head < 0:
+        raise ValueError(f"Invalid head: {head}")
+    logger.debug(f"Retrieving first {head} characters of calculator guide")
+    return _GUIDE[:head]
+
+
+# ==================== PROMPTS ====================
+
+# Only the expression varies, so the prompt body is stripped once up front
+_CALC_TMPL = """
     Please evaluate the following mathematical expression step by step:
     
     Expression: {expression}
@@ -200,9 +323,22 @@ def calculate_expression(expression: str) -> str:
     5. Provide the final result
     
     Available tools: add, subtract, multiply, divide
+    """.strip()
+
+
+@mcp.prompt
+def calculate_expression(expression: str) -> str:
     """
+    Provides instructions for evaluating a mathematical expression.
     
-    return prompt.strip()
+    Args:
+        expression: A mathematical expression to evaluate
+        
+    Returns:
+        Formatted prompt instructing the LLM how to evaluate the expression
+    """
+    logger.debug(f"Generating calculation prompt for: {expression}")
+    return _CALC_TMPL.format(expression=expression)
 
 
 # ==================== SERVER STARTUP ====================
@@ -1,33 +1,103 @@
 import json
 import logging
+import os
 import sys
-from typing import Dict, List
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Tuple, TypedDict
 import asyncio
 from fastmcp import FastMCP
+from log_setup import configure_logging
 
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stderr
-)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 mcp = FastMCP(name="DataProcessorServer")
 
+# Tool bodies must not hold the event loop; the artificial I/O delays used
+# for demos only run when SIMULATE_LATENCY is 1, true or yes
+SIMULATE_LATENCY = os.environ.get("SIMULATE_LATENCY", "").strip().lower() in {"1", "true", "yes"}
+
+@dataclass(slots=True, frozen=True)
+class User:
+    """A user record in the data store."""
+    id: int
+    name: str
+    email: str
+
+
+@dataclass(slots=True, frozen=True)
+class Product:
+    """A product record in the data store."""
+    id: int
+    name: str
+    price: float
+
+
+class DataStore(TypedDict):
+    """Shape of the in-memory data store."""
+    users: List[User]
+    products: List[Product]
+
+
 # Simulated data store
-DATA_STORE: Dict[str, List[Dict]] = {
+DATA_STORE: DataStore = {
     "users": [
-        {"id": 1, "name": "Alice", "email": "alice@example.com"},
-        {"id": 2, "name": "Bob", "email": "bob@example.com"},
-        {"id": 3, "name": "Charlie", "email": "charlie@example.com"},
+        User(id=1, name="Alice", email="alice@example.com"),
+        User(id=2, name="Bob", email="bob@example.com"),
+        User(id=3, name="Charlie", email="charlie@example.com"),
     ],
     "products": [
-        {"id": 101, "name": "Laptop", "price": 999.99},
-        {"id": 102, "name": "Mouse", "price": 29.99},
-        {"id": 103, "name": "Keyboard", "price": 79.99},
+        Product(id=101, name="Laptop", price=999.99),
+        Product(id=102, name="Mouse", price=29.99),
+        Product(id=103, name="Keyboard", price=79.99),
     ]
 }
 
+# Primary-key indexes for O(1) lookups by id, plus precomputed dict views
+# so responses don't rebuild a dict from the record on every call. The views
+# are shared: tools hand out shallow copies, never the views themselves
+_USER_DICT: Dict[int, Dict] = {u.id: asdict(u) for u in DATA_STORE["users"]}
+_PRODUCT_BY_ID: Dict[int, Product] = {p.id: p for p in DATA_STORE["products"]}
+_PRODUCT_DICT: Dict[int, Dict] = {p.id: asdict(p) for p in DATA_STORE["products"]}
+
+# Running total of product prices, kept in sync by add_product/remove_product
+_price_sum: float = sum(p.price for p in DATA_STORE["products"])
+
+
+def add_product(product: Product) -> None:
+    """Add a product to the store, keeping the id indexes and price total in sync."""
+    global _price_sum
+    if product.id in _PRODUCT_BY_ID:
+        raise ValueError(f"Product with id {product.id} already exists")
+    DATA_STORE["products"].append(product)
+    _PRODUCT_BY_ID[product.id] = product
+    _PRODUCT_DICT[product.id] = asdict(product)
+    _price_sum += product.price
+
+
+def remove_product(product_id: int) -> Product:
+    """Remove a product from the store, keeping the id indexes and price total in sync."""
+    global _price_sum
+    product = _PRODUCT_BY_ID.pop(product_id, None)
+    if product is None:
+        raise KeyError(f"Product with id {product_id} not found")
+    del _PRODUCT_DICT[product_id]
+    DATA_STORE["products"].remove(product)
+    _price_sum -= product.price
+    return product
+
+
+# Lowercased "name\0email" per user so searches skip per-query lower() calls;
+# the NUL separator keeps matches from spanning the two fields
+_USER_SEARCH_INDEX: List[Tuple[Dict, str]] = [
+    (_USER_DICT[u.id], (u.name + "\x00" + u.email).lower()) for u in DATA_STORE["users"]
+]
+
+# Cached get_user_details results: user_id -> (timestamp, details)
+MAX_AGE_S = 300
+_USER_DETAILS_CACHE: Dict[int, Tuple[float, Dict]] = {}
+
 
 # ==================== ASYNC TOOLS ====================
 
@@ -53,12 +123,10 @@ async def search_users(query: str) -> List[Dict]:
         query_lower = query.lower()
         
         # Simulate async operation (e.g., database query)
-        await asyncio.sleep(0.1)
+        if SIMULATE_LATENCY:
+            await asyncio.sleep(0.1)
         
-        matches = [
-            user for user in DATA_STORE["users"]
-            if query_lower in user["name"].lower() or query_lower in user["email"].lower()
-        ]
+        matches = [dict(user) for user, haystack in _USER_SEARCH_INDEX if query_lower in haystack]
         
         logger.info(f"User search for '{query}' found {len(matches)} results")
         return matches
@@ -90,13 +158,17 @@ async def get_user_details(user_id: int) -> Dict:
         if not isinstance(user_id, int) or user_id < 0:
             raise ValueError(f"Invalid user_id: {user_id}")
         
+        cached = _USER_DETAILS_CACHE.get(user_id)
+        if cached and time.monotonic() - cached[0] < MAX_AGE_S:
+            logger.info(f"Retrieved cached details for user {user_id}")
+            # Hand out a copy so callers can't corrupt the cached entry
+            return dict(cached[1])
+        
         # Simulate async database operation
-        await asyncio.sleep(0.05)
+        if SIMULATE_LATENCY:
+            await asyncio.sleep(0.05)
         
-        user = next(
-            (u for u in DATA_STORE["users"] if u["id"] == user_id),
-            None
-        )
+        user = _USER_DICT.get(user_id)
         
         if not user:
             logger.warning(f"User {user_id} not found")
@@ -109,8 +181,9 @@ async def get_user_details(user_id: int) -> Dict:
             "created_at": "2024-01-15"
         }
         
+        _USER_DETAILS_CACHE[user_id] = (time.monotonic(), user_with_details)
         logger.info(f"Retrieved details for user {user_id}")
-        return user_with_details
+        return dict(user_with_details)
     
     except (ValueError, KeyError) as e:
         logger.error(f"Error getting user details: {e}")
@@ -130,14 +203,14 @@ async def calculate_average_product_price() -> float:
     """
     try:
         # Simulate complex calculation
-        await asyncio.sleep(0.2)
+        if SIMULATE_LATENCY:
+            await asyncio.sleep(0.2)
         
         if not DATA_STORE["products"]:
             logger.warning("No products available for price calculation")
             raise ValueError("No products in store")
         
-        total = sum(p["price"] for p in DATA_STORE["products"])
-        average = total / len(DATA_STORE["products"])
+        average = _price_sum / len(DATA_STORE["products"])
         
         logger.info(f"Calculated average product price: ${average:.2f}")
         return round(average, 2)
@@ -168,27 +241,21 @@ def get_product_by_id(product_id: int) -> Dict:
     """
     logger.debug(f"Fetching product {product_id}")
     
-    product = next(
-        (p for p in DATA_STORE["products"] if p["id"] == product_id),
-        None
-    )
+    product = _PRODUCT_DICT.get(product_id)
     
     if not product:
         logger.warning(f"Product {product_id} not found")
         return {
             "error": f"Product {product_id} not found",
-            "available_ids": [p["id"] for p in DATA_STORE["products"]]
+            "available_ids": list(_PRODUCT_BY_ID)
         }
     
-    return product
+    return dict(product)
 
 
 # ==================== PROMPTS ====================
 
-@mcp.prompt
-def analyze_user_data(user_id: int) -> str:
-    """Prompt template for analyzing user data."""
-    return f"""
+_ANALYZE_TMPL = """
     You are analyzing data for user ID {user_id}.
     
     1. First, retrieve the user details using get_user_details tool with user_id={user_id}
@@ -198,6 +265,12 @@ def analyze_user_data(user_id: int) -> str:
     """
 
 
+@mcp.prompt
+def analyze_user_data(user_id: int) -> str:
+    """Prompt template for analyzing user data."""
+    return _ANALYZE_TMPL.format(user_id=user_id)
+
+
 # ==================== SERVER STARTUP ====================
 
 if __name__ == "__main__":
@@ -0,0 +1,36 @@
+import atexit
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+
+def configure_logging() -> None:
+    """
+    Send root logging to stderr through a queue drained by a background thread.
+
+    Tool calls then never block on stderr writes (stdout is reserved for the
+    MCP protocol). LOG_LEVEL (default WARNING) is read once here; unknown
+    values fall back to WARNING. Does nothing if the root logger already has
+    handlers, e.g. when a client configured logging before importing a server.
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+
+    level = os.environ.get("LOG_LEVEL", "WARNING").strip().upper()
+    if not isinstance(logging.getLevelName(level), int):
+        level = "WARNING"
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(
+        logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    listener = QueueListener(log_queue, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+    root.setLevel(level)
+    root.addHandler(QueueHandler(log_queue))
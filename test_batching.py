@@ -0,0 +1,188 @@
+import asyncio
+import json
+import unittest
+from types import SimpleNamespace
+
+from fastmcp import Client
+from fastmcp.exceptions import ToolError
+
+from calculator_client import BatchingClient
+from calculator_server import evaluate, evaluate_batch, mcp
+
+
+def _json_text_result(value):
+    """Build a CallToolResult-like object carrying `value` as JSON text."""
+    return SimpleNamespace(content=[SimpleNamespace(text=json.dumps(value))])
+
+
+class CountingClient:
+    """Forwards to a real client and records every call_tool name."""
+
+    def __init__(self, client):
+        self._client = client
+        self.calls = []
+
+    async def call_tool(self, name, arguments):
+        self.calls.append(name)
+        return await self._client.call_tool(name, arguments)
+
+
+class FakeBatchClient:
+    """Answers evaluate_batch with canned outcomes after an optional delay."""
+
+    def __init__(self, outcomes, delay=0.0):
+        self._outcomes = outcomes
+        self._delay = delay
+
+    async def call_tool(self, name, arguments):
+        await asyncio.sleep(self._delay)
+        return _json_text_result(self._outcomes)
+
+
+class BatchingClientTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_concurrent_calls_are_coalesced(self):
+        async with Client(mcp) as client:
+            counting = CountingClient(client)
+            batcher = BatchingClient(counting)
+            results = await asyncio.gather(
+                batcher.call_tool("add", {"a": 15, "b": 27}),
+                batcher.call_tool("multiply", {"a": 6, "b": 7}),
+                batcher.call_tool("subtract", {"a": 50, "b": 8}),
+            )
+        self.assertEqual(results, [42.0, 42.0, 42.0])
+        self.assertEqual(counting.calls, ["evaluate_batch"])
+
+    async def test_errors_map_back_to_their_caller(self):
+        async with Client(mcp) as client:
+            batcher = BatchingClient(client)
+            results = await asyncio.gather(
+                batcher.call_tool("divide", {"a": 100, "b": 5}),
+                batcher.call_tool("divide", {"a": 10, "b": 0}),
+                return_exceptions=True
+            )
+        self.assertEqual(results[0], 20.0)
+        self.assertIsInstance(results[1], ToolError)
+        self.assertEqual(
+            str(results[1]), "Error calling tool 'divide': Cannot divide by zero"
+        )
+
+    async def test_batched_errors_match_single_call_errors(self):
+        async with Client(mcp) as client:
+            batcher = BatchingClient(client)
+            for arguments in ({"a": "x", "b": 1}, {"a": 1}, {"a": 1, "b": 2, "c": 3}):
+                with self.assertRaises(ToolError) as alone:
+                    await client.call_tool("add", arguments)
+                batched = await asyncio.gather(
+                    batcher.call_tool("add", arguments),
+                    batcher.call_tool("add", {"a": 1, "b": 1}),
+                    return_exceptions=True
+                )
+                self.assertEqual(str(batched[0]), str(alone.exception))
+                self.assertEqual(batched[1], 2.0)
+
+    async def test_arguments_cannot_override_the_tool_name(self):
+        async with Client(mcp) as client:
+            batcher = BatchingClient(client)
+            results = await asyncio.gather(
+                batcher.call_tool("add", {"a": 1, "b": 2, "op": "multiply"}),
+                batcher.call_tool("add", {"a": 1, "b": 1}),
+                return_exceptions=True
+            )
+        self.assertIsInstance(results[0], ToolError)
+        self.assertEqual(results[1], 2.0)
+
+    async def test_batched_operands_coerce_like_single_calls(self):
+        async with Client(mcp) as client:
+            batcher = BatchingClient(client)
+            alone = await batcher.call_tool("add", {"a": "3", "b": 4})
+            batched = await asyncio.gather(
+                batcher.call_tool("add", {"a": "3", "b": 4}),
+                batcher.call_tool("add", {"a": 1, "b": 1}),
+            )
+        self.assertEqual(alone, 7.0)
+        self.assertEqual(batched, [7.0, 2.0])
+
+    async def test_cancelled_caller_does_not_break_the_batch(self):
+        outcomes = [{"result": 1.0}, {"result": 2.0}, {"result": 3.0}]
+        batcher = BatchingClient(FakeBatchClient(outcomes, delay=0.01))
+        tasks = [
+            asyncio.create_task(batcher.call_tool("add", {"a": i, "b": 0}))
+            for i in range(3)
+        ]
+        await asyncio.sleep(0)
+        tasks[0].cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertIsInstance(results[0], asyncio.CancelledError)
+        self.assertEqual(results[1:], [2.0, 3.0])
+
+    async def test_short_outcome_list_fails_every_caller(self):
+        batcher = BatchingClient(FakeBatchClient([{"result": 1.0}]))
+        results = await asyncio.wait_for(
+            asyncio.gather(
+                batcher.call_tool("add", {"a": 1, "b": 0}),
+                batcher.call_tool("add", {"a": 2, "b": 0}),
+                return_exceptions=True
+            ),
+            timeout=1
+        )
+        for result in results:
+            self.assertIsInstance(result, ToolError)
+
+
+class EvaluateBatchTest(unittest.TestCase):
+
+    def test_failing_step_does_not_abort_the_rest(self):
+        outcomes = evaluate_batch([
+            {"op": "add", "a": 1, "b": 2},
+            {"op": ["x"], "a": 1, "b": 2},
+            {"op": "divide", "a": 1, "b": 0},
+            {"op": "multiply", "a": "2", "b": 3},
+        ])
+        self.assertEqual(outcomes[0], {"result": 3.0})
+        self.assertIn("error", outcomes[1])
+        self.assertEqual(outcomes[2], {"error": "Cannot divide by zero"})
+        self.assertEqual(outcomes[3], {"result": 6.0})
+
+    def test_steps_must_have_exactly_op_a_and_b(self):
+        outcomes = evaluate_batch([
+            {"op": "add", "a": 1},
+            {"op": "add", "a": 1, "b": 2, "c": 3},
+        ])
+        self.assertIn("missing ['b']", outcomes[0]["error"])
+        self.assertIn("unexpected ['c']", outcomes[1]["error"])
+
+
+
+class EvaluateTest(unittest.TestCase):
+
+    def test_chained_references(self):
+        result = evaluate([
+            {"op": "add", "a": 10, "b": 5},
+            {"op": "multiply", "a": "$0", "b": 3},
+            {"op": "subtract", "a": "$1", "b": 7},
+        ])
+        self.assertEqual(result, 38.0)
+
+    def test_invalid_references_are_rejected(self):
+        for reference in ("$-1", "$3", "$x"):
+            with self.subTest(reference=reference):
+                with self.assertRaisesRegex(ValueError, "Invalid result reference"):
+                    evaluate([
+                        {"op": "add", "a": 1, "b": 2},
+                        {"op": "multiply", "a": reference, "b": 3},
+                    ])
+
+    def test_empty_ops_are_rejected(self):
+        with self.assertRaisesRegex(ValueError, "No operations"):
+            evaluate([])
+
+    def test_division_by_zero_inside_a_chain(self):
+        with self.assertRaisesRegex(ValueError, "Cannot divide by zero"):
+            evaluate([
+                {"op": "subtract", "a": 2, "b": 2},
+                {"op": "divide", "a": 1, "b": "$0"},
+            ])
+
+if __name__ == "__main__":
+    unittest.main()
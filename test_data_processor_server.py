@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+import data_processor_server as server
+
+
+class GetUserDetailsCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        server._USER_DETAILS_CACHE.clear()
+        self.addCleanup(server._USER_DETAILS_CACHE.clear)
+
+    async def test_cache_hit_within_max_age(self):
+        with mock.patch.object(server.time, "monotonic", return_value=1000.0):
+            first = await server.get_user_details(1)
+        with mock.patch.object(server.time, "monotonic", return_value=1000.0 + server.MAX_AGE_S - 1):
+            with mock.patch.dict(server._USER_DICT, {1: {"id": 1, "name": "Changed", "email": "x"}}):
+                second = await server.get_user_details(1)
+        self.assertEqual(second, first)
+
+    async def test_cache_expires_after_max_age(self):
+        with mock.patch.object(server.time, "monotonic", return_value=1000.0):
+            await server.get_user_details(1)
+        with mock.patch.object(server.time, "monotonic", return_value=1000.0 + server.MAX_AGE_S):
+            with mock.patch.dict(server._USER_DICT, {1: {"id": 1, "name": "Changed", "email": "x"}}):
+                refreshed = await server.get_user_details(1)
+        self.assertEqual(refreshed["name"], "Changed")
+
+    async def test_mutating_a_result_does_not_touch_the_cache(self):
+        details = await server.get_user_details(1)
+        details["name"] = "HACK"
+        again = await server.get_user_details(1)
+        self.assertEqual(again["name"], "Alice")
+
+
+class ProductAggregateTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_add_and_remove_keep_price_sum_in_sync(self):
+        original_sum = server._price_sum
+        server.add_product(server.Product(id=999, name="Cable", price=10.0))
+        try:
+            self.assertAlmostEqual(server._price_sum, original_sum + 10.0)
+            self.assertEqual(
+                await server.calculate_average_product_price(),
+                round((original_sum + 10.0) / 4, 2)
+            )
+            self.assertEqual(server.get_product_by_id(999)["name"], "Cable")
+        finally:
+            server.remove_product(999)
+        self.assertAlmostEqual(server._price_sum, original_sum)
+        self.assertNotIn(999, server._PRODUCT_BY_ID)
+
+    def test_duplicate_and_missing_ids_are_rejected(self):
+        with self.assertRaises(ValueError):
+            server.add_product(server.Product(id=101, name="Dup", price=1.0))
+        with self.assertRaises(KeyError):
+            server.remove_product(12345)
+
+
+
+class SharedViewTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_search_results_are_copies(self):
+        results = await server.search_users("bob")
+        results[0]["email"] = "z"
+        self.assertEqual(server._USER_DICT[2]["email"], "bob@example.com")
+
+    def test_product_lookups_are_copies(self):
+        product = server.get_product_by_id(102)
+        product["price"] = 0.0
+        self.assertEqual(server.get_product_by_id(102)["price"], 29.99)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import math
+import unittest
+from types import SimpleNamespace
+
+from calculator_client import extract_tool_result
+
+
+def _raw_text_result(text):
+    """Build a CallToolResult-like object carrying `text`."""
+    return SimpleNamespace(content=[SimpleNamespace(text=text)])
+
+
+class ExtractToolResultTest(unittest.TestCase):
+
+    def test_plain_numbers(self):
+        self.assertEqual(extract_tool_result(_raw_text_result("42")), 42)
+        self.assertEqual(extract_tool_result(_raw_text_result("-3.25")), -3.25)
+        self.assertEqual(extract_tool_result(_raw_text_result("5.")), 5.0)
+
+    def test_non_finite_json_values(self):
+        self.assertTrue(math.isnan(extract_tool_result(_raw_text_result("NaN"))))
+        self.assertEqual(extract_tool_result(_raw_text_result("Infinity")), math.inf)
+
+    def test_json_result_field_and_plain_text(self):
+        self.assertEqual(extract_tool_result(_raw_text_result('{"result": 7}')), 7)
+        self.assertEqual(extract_tool_result(_raw_text_result("hello")), "hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from fastmcp import Client, Context, FastMCP
+from fastmcp.exceptions import ToolError
+
+from calculator_client import InProcessClient, extract_tool_result
+from calculator_server import mcp as calculator_mcp
+from data_processor_server import mcp as data_mcp
+
+
+context_mcp = FastMCP(name="ContextServer")
+
+
+@context_mcp.tool
+def who(ctx: Context) -> str:
+    """Return a constant; only here to require context injection."""
+    return "x"
+
+
+class InProcessClientTest(unittest.IsolatedAsyncioTestCase):
+
+    async def assertSameAsMcp(self, server, name, arguments):
+        async with Client(server) as client:
+            direct = await InProcessClient(client).call_tool(name, arguments)
+            over_mcp = await client.call_tool(name, arguments)
+        self.assertEqual(extract_tool_result(direct), extract_tool_result(over_mcp))
+
+    async def test_arguments_are_validated_and_coerced(self):
+        await self.assertSameAsMcp(calculator_mcp, "add", {"a": "1", "b": "2"})
+        await self.assertSameAsMcp(calculator_mcp, "add", {"a": 15, "b": 27})
+
+    async def test_wrapped_and_unwrapped_results(self):
+        await self.assertSameAsMcp(data_mcp, "search_users", {"query": "al"})
+        await self.assertSameAsMcp(data_mcp, "get_user_details", {"user_id": 1})
+
+    async def test_context_tools_are_supported(self):
+        await self.assertSameAsMcp(context_mcp, "who", {})
+
+    async def test_error_messages_match_mcp(self):
+        async with Client(calculator_mcp) as client:
+            in_process = InProcessClient(client)
+            for arguments in ({"a": 1, "b": 0}, {"a": 1}):
+                with self.assertRaises(ToolError) as direct:
+                    await in_process.call_tool("divide", arguments)
+                with self.assertRaises(ToolError) as over_mcp:
+                    await client.call_tool("divide", arguments)
+                self.assertEqual(str(direct.exception), str(over_mcp.exception))
+
+    async def test_unknown_tool_falls_back_to_client(self):
+        async with Client(calculator_mcp) as client:
+            with self.assertRaises(ToolError):
+                await InProcessClient(client).call_tool("missing", {})
+
+    async def test_errors_raise_tool_error(self):
+        async with Client(calculator_mcp) as client:
+            in_process = InProcessClient(client)
+            with self.assertRaises(ToolError):
+                await in_process.call_tool("divide", {"a": 1, "b": 0})
+            with self.assertRaises(ToolError):
+                await in_process.call_tool("add", {"a": "x", "b": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()